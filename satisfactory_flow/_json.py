@@ -0,0 +1,49 @@
+"""JSON helpers that use :mod:`orjson` when it is installed."""
+import json
+import os
+from typing import Any, Dict, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_file(path: str) -> Any:
+    """Parse the JSON document stored at ``path``."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dumps(data: Any) -> bytes:
+    """Return ``data`` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+def dump_workspace(
+    nodes: Iterable[Dict], disabled_recipes: Iterable[str], path: str
+) -> None:
+    """Write a workspace document to ``path`` with one node per line.
+
+    Nodes are encoded one at a time as they are produced by ``nodes``, so
+    the whole document is never held in memory. The document is written to
+    a temporary file next to ``path`` and then renamed over it, so an
+    interrupted save never leaves a truncated file.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(b'{\n  "nodes": [')
+        sep = b'\n    '
+        for node in nodes:
+            f.write(sep)
+            f.write(_dumps(node))
+            sep = b',\n    '
+        f.write(b'\n  ],\n  "disabled_recipes": ')
+        f.write(_dumps(list(disabled_recipes)))
+        f.write(b'\n}\n')
+    os.replace(tmp, path)
@@ -1,185 +1,528 @@
-import json
 import os
-from typing import Dict, List, Set
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Set, Tuple
 from math import ceil
+from operator import itemgetter
 
 from .models import Node
+from ._json import load_file
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 
-with open(os.path.join(DATA_DIR, 'items.json'), 'r', encoding='utf-8') as f:
-    ITEMS: Dict[str, Dict] = json.load(f)
-with open(os.path.join(DATA_DIR, 'recipes.json'), 'r', encoding='utf-8') as f:
-    RECIPES: Dict[str, Dict] = json.load(f)
-with open(os.path.join(DATA_DIR, 'buildings.json'), 'r', encoding='utf-8') as f:
-    BUILDINGS: Dict[str, Dict] = json.load(f)
+# The data tables below are only parsed on first use (see ``_load_data`` and
+# the module ``__getattr__``) so importing this module stays cheap. They are
+# not bound until then, which is what lets ``__getattr__`` step in; the
+# TYPE_CHECKING block only declares them for type checkers and linters.
+# Code in this module must make sure ``_load_data`` has run before reading
+# them.
+if TYPE_CHECKING:
+    ITEMS: Dict[str, Dict] = {}
+    RECIPES: Dict[str, Dict] = {}
+    BUILDINGS: Dict[str, Dict] = {}
+    ITEMS_BY_NAME: Dict[str, str] = {}
+    ITEM_NAMES: Dict[str, str] = {}
+    # Every item name in sorted order, for pick lists
+    ITEM_NAMES_SORTED: List[str] = []
+    RECIPES_BY_NAME: Dict[str, Dict] = {}
+    # ``(recipe_class, name)`` of every alternate recipe, sorted by name
+    ALT_RECIPES: List[Tuple[str, str]] = []
+    RECIPES_BY_OUTPUT: Dict[str, Dict] = {}
+    RESOLVED: Dict[str, "ResolvedRecipe"] = {}
+    # One distinct bit per item id so sets of items can be packed into an int
+    _ITEM_BITS: Dict[str, int] = {}
+    # Candidate recipes that can produce each item, in data order, and the
+    # items produced by each recipe class. Together they let
+    # set_disabled_recipes revisit only the items affected by a toggle.
+    _BY_ITEM_CANDIDATES: Dict[str, List["_Candidate"]] = {}
+    _RECIPE_OUTPUTS: Dict[str, Tuple[str, ...]] = {}
+
+_LAZY_TABLES = frozenset({
+    'ITEMS', 'RECIPES', 'BUILDINGS', 'ITEMS_BY_NAME', 'ITEM_NAMES',
+    'ITEM_NAMES_SORTED', 'RECIPES_BY_NAME', 'ALT_RECIPES', 'RECIPES_BY_OUTPUT',
+    'RESOLVED', '_ITEM_BITS', '_BY_ITEM_CANDIDATES', '_RECIPE_OUTPUTS',
+})
+_DATA_LOADED = False
+# Held while the tables are built, while the recipe selection changes and
+# while a workspace is generated (which fills _SUBTREE_CACHE), so the GUI and
+# console may call into this module from worker threads.
+_LOCK = threading.RLock()
 
-ITEMS_BY_NAME: Dict[str, str] = {v['name']: k for k, v in ITEMS.items()}
-RECIPES_BY_NAME: Dict[str, Dict] = {v['name']: v for v in RECIPES.values()}
+DISABLED_RECIPES: Set[str] = set()
 
 
-DISABLED_RECIPES: Set[str] = set()
+class _Candidate(NamedTuple):
+    """The recipe fields used to choose between recipes, read once at load."""
 
+    recipe_class: str
+    recipe: Dict
+    is_packaging: bool
+    is_packaged: bool
+    alternate: bool
 
-def _map_recipes(disabled: Set[str] | None = None) -> Dict[str, Dict]:
-    """Return best recipe choice for each item.
+
+def _candidate(cls: str, recipe: Dict) -> _Candidate:
+    name = recipe.get('name', '').lower()
+    return _Candidate(
+        recipe_class=cls,
+        recipe=recipe,
+        is_packaging=name.startswith(("packaged ", "unpackage")),
+        is_packaged=name.startswith("packaged "),
+        alternate=bool(recipe.get('alternate')),
+    )
+
+
+def _best_recipe(
+    item: str, recs: List[_Candidate], items: Dict[str, Dict]
+) -> Dict | None:
+    """Return the preferred recipe for ``item`` among ``recs``.
 
     Packaging and unpackaging recipes are ignored when a non-packaging recipe
     exists for the same item. If an item only has packaging related recipes,
     prefer the one that does not directly feed on the item itself. Otherwise the
-    item is treated as a raw resource.
+    item is treated as a raw resource and ``None`` is returned.
     """
+    if not recs:
+        return None
+    item_name = items.get(item, {}).get("_name_lower", "")
+    non_pack = [r for r in recs if not r.is_packaging]
+    if non_pack:
+        candidates = non_pack
+    else:
+        if item_name.startswith("packaged "):
+            pack_recs = [r for r in recs if r.is_packaged]
+            if not pack_recs:
+                return None
+            candidates = pack_recs
+        else:
+            return None  # treat as raw resource
 
-    # Collect candidate recipes per item first
-    by_item: Dict[str, List[Dict]] = {}
-    for cls, data in RECIPES.items():
-        if disabled and cls in disabled:
-            continue
-        if "Desc_Converter_C" in data.get("producedIn", []):
-            continue
-        for prod in data.get("products", []):
-            by_item.setdefault(prod["item"], []).append(data)
-
-    mapping: Dict[str, Dict] = {}
-
-    def is_packaging(rec: Dict) -> bool:
-        name = rec.get("name", "").lower()
-        return name.startswith("packaged ") or name.startswith("unpackage")
+    # Prefer non-alternate recipes
+    for r in candidates:
+        if not r.alternate:
+            return r.recipe
+    return candidates[0].recipe
 
-    for item, recs in by_item.items():
-        item_name = ITEMS.get(item, {}).get("name", "")
-        non_pack = [r for r in recs if not is_packaging(r)]
-        if non_pack:
-            candidates = non_pack
-        else:
-            if item_name.lower().startswith("packaged "):
-                pack_recs = [r for r in recs if r.get("name", "").lower().startswith("packaged ")]
-                if not pack_recs:
-                    continue
-                candidates = pack_recs
-            else:
-                continue  # treat as raw resource
-
-        # Prefer non-alternate recipes
-        best = None
-        for r in candidates:
-            if not r.get("alternate"):
-                best = r
-                break
-        if best is None:
-            best = candidates[0]
-        mapping[item] = best
 
+def _map_recipes(
+    candidates: Dict[str, List[_Candidate]],
+    items: Dict[str, Dict],
+    disabled: Set[str] | None = None,
+) -> Dict[str, Dict]:
+    """Return best recipe choice for each item (see :func:`_best_recipe`)."""
+    mapping: Dict[str, Dict] = {}
+    for item, cands in candidates.items():
+        recs = [c for c in cands if not disabled or c.recipe_class not in disabled]
+        best = _best_recipe(item, recs, items)
+        if best is not None:
+            mapping[item] = best
     return mapping
 
 
-RECIPES_BY_OUTPUT = _map_recipes()
+class ResolvedRecipe(NamedTuple):
+    """Recipe data for one output item with all lookups done up front.
 
+    ``per_machine`` is the output per minute of a single building at 100%
+    clock. ``ingredients`` holds ``(item_id, name, amount)`` and ``products``
+    ``(name, amount)`` per recipe cycle of ``duration`` seconds.
+    """
 
-def set_disabled_recipes(disabled: Set[str]) -> None:
-    """Update globally disabled recipes and rebuild the recipe mapping."""
-    global DISABLED_RECIPES, RECIPES_BY_OUTPUT
-    DISABLED_RECIPES = set(disabled)
-    RECIPES_BY_OUTPUT = _map_recipes(DISABLED_RECIPES)
+    item_name: str
+    building_name: str
+    base_power: float
+    per_machine: float
+    recipe_name: str
+    duration: float
+    ingredients: Tuple[Tuple[str, str, float], ...]
+    products: Tuple[Tuple[str, float], ...]
 
 
-def _gen_nodes(
+def _resolve_recipe(
     item_id: str,
-    rate: float,
-    nodes: List[Node],
-    seen: set[str] | None = None,
-    sources: Set[str] | None = None,
-) -> None:
-    if seen is None:
-        seen = set()
-    if sources and item_id in sources:
-        item_name = ITEMS.get(item_id, {}).get("name", item_id)
-        nodes.append(
-            Node(
-                name=f"Source {item_name}",
-                base_power=0.0,
-                inputs={},
-                outputs={item_name: rate},
-                primary_output=item_name,
-            )
-        )
-        return
-    if item_id in seen:
-        item_name = ITEMS.get(item_id, {}).get('name', item_id)
-        nodes.append(
-            Node(
-                name=f"Loop {item_name}",
-                base_power=0.0,
-                inputs={},
-                outputs={item_name: rate},
-                primary_output=item_name,
-            )
-        )
-        return
-    seen.add(item_id)
-    recipe = RECIPES_BY_OUTPUT.get(item_id)
-    item_name = ITEMS.get(item_id, {}).get('name', item_id)
-    if not recipe:
-        nodes.append(
-            Node(
-                name=f"Source {item_name}",
-                base_power=0.0,
-                inputs={},
-                outputs={item_name: rate},
-                primary_output=item_name,
-            )
-        )
-        return
-
+    recipe: Dict,
+    buildings: Dict[str, Dict],
+    item_names: Dict[str, str],
+) -> ResolvedRecipe | None:
+    """Flatten ``recipe`` producing ``item_id`` into a :class:`ResolvedRecipe`.
+
+    Returns ``None`` when the recipe yields nothing per minute, in which case
+    the item is treated as a raw resource.
+    """
     building_id = recipe.get('producedIn', [None])[0]
-    building = BUILDINGS.get(building_id, {
+    building = buildings.get(building_id, {
         'name': building_id or 'Manual',
         'powerUsage': 0,
         'somersloopSlots': 0,
     })
-
-    building_name = building.get('name', building_id or 'Manual')
-    base_power = building.get('powerUsage', 0.0)
+    duration = recipe['duration']
 
     out_amount = 0.0
     for p in recipe.get('products', []):
         if p['item'] == item_id:
             out_amount = p['amount']
             break
-    per_machine = out_amount * 60.0 / recipe['duration'] if recipe['duration'] else 0.0
-    machines = rate / per_machine if per_machine > 0 else 1.0
-
-    outputs: Dict[str, float] = {}
-    for prod in recipe.get('products', []):
-        prod_name = ITEMS.get(prod['item'], {}).get('name', prod['item'])
-        prod_rate = machines * prod['amount'] * 60.0 / recipe['duration']
-        outputs[prod_name] = prod_rate
-
-    node = Node(
-        name=f"{building_name} ({recipe['name']})",
-        base_power=base_power,
-        inputs={},
-        outputs=outputs,
-        count=machines,
+    if not duration or out_amount <= 0:
+        return None
+
+    return ResolvedRecipe(
+        item_name=item_names.get(item_id, item_id),
+        building_name=building.get('name', building_id or 'Manual'),
+        base_power=building.get('powerUsage', 0.0),
+        per_machine=out_amount * 60.0 / duration,
+        recipe_name=recipe['name'],
+        duration=duration,
+        ingredients=tuple(
+            (ing['item'], item_names.get(ing['item'], ing['item']), ing['amount'])
+            for ing in recipe.get('ingredients', [])
+        ),
+        products=tuple(
+            (item_names.get(prod['item'], prod['item']), prod['amount'])
+            for prod in recipe.get('products', [])
+        ),
+    )
+
+
+def _resolve_recipes(
+    mapping: Dict[str, Dict],
+    buildings: Dict[str, Dict],
+    item_names: Dict[str, str],
+) -> Dict[str, ResolvedRecipe]:
+    """Resolve the chosen recipe of every item in ``mapping``."""
+    resolved: Dict[str, ResolvedRecipe] = {}
+    for item_id, recipe in mapping.items():
+        entry = _resolve_recipe(item_id, recipe, buildings, item_names)
+        if entry is not None:
+            resolved[item_id] = entry
+    return resolved
+
+
+def _intern_names(table: Dict[str, Dict]) -> None:
+    """Intern every ``name`` in ``table`` so equal names share one object."""
+    for entry in table.values():
+        name = entry.get('name')
+        if isinstance(name, str):
+            entry['name'] = sys.intern(name)
+
+
+def _add_lowercase_names(items: Dict[str, Dict]) -> None:
+    """Store the lowercased item names used by _best_recipe."""
+    for item in items.values():
+        item['_name_lower'] = item.get('name', '').lower()
+
+
+def _data_file(name: str) -> str:
+    """Path of data table ``name``, preferring its compact ``.min.json`` copy.
+
+    ``scripts/update_data.py`` writes the compact copy next to the indented
+    file. It is only used while it is at least as new as the indented file,
+    so hand edits to the latter are never shadowed by a stale copy.
+    """
+    path = os.path.join(DATA_DIR, name + '.json')
+    compact = os.path.join(DATA_DIR, name + '.min.json')
+    try:
+        if os.stat(compact).st_mtime >= os.stat(path).st_mtime:
+            return compact
+    except OSError:
+        pass
+    return path
+
+
+def _load_data() -> None:
+    """Parse the data files and build the lookup tables if not done yet.
+
+    Safe to call from any thread; the tables are built once, under ``_LOCK``.
+    """
+    if _DATA_LOADED:
+        return
+    with _LOCK:
+        if not _DATA_LOADED:
+            _build_tables()
+
+
+def _build_tables() -> None:
+    """Build every lazy table; called by ``_load_data`` with ``_LOCK`` held.
+
+    Everything is built in locals and the module globals are bound together
+    at the end, so a failure part way leaves no half built table visible.
+    """
+    global ITEMS, RECIPES, BUILDINGS, ITEMS_BY_NAME, ITEM_NAMES, RECIPES_BY_NAME
+    global ITEM_NAMES_SORTED, ALT_RECIPES
+    global RECIPES_BY_OUTPUT, RESOLVED, _ITEM_BITS, _DATA_LOADED
+    global _BY_ITEM_CANDIDATES, _RECIPE_OUTPUTS
+    items = load_file(_data_file('items'))
+    recipes = load_file(_data_file('recipes'))
+    buildings = load_file(_data_file('buildings'))
+    for table in (items, recipes, buildings):
+        _intern_names(table)
+    _add_lowercase_names(items)
+
+    items_by_name = {v['name']: k for k, v in items.items()}
+    item_names = {k: v['name'] for k, v in items.items()}
+    names_sorted = sorted(items_by_name)
+    recipes_by_name = {v['name']: v for v in recipes.values()}
+    alt_recipes = sorted(
+        ((k, v['name']) for k, v in recipes.items() if v.get('alternate')),
+        key=itemgetter(1),
+    )
+
+    item_bits: Dict[str, int] = {}
+    for item_id in items:
+        item_bits[item_id] = 1 << len(item_bits)
+    for recipe in recipes.values():
+        for entry in recipe.get('ingredients', []) + recipe.get('products', []):
+            if entry['item'] not in item_bits:
+                item_bits[entry['item']] = 1 << len(item_bits)
+
+    by_item: Dict[str, List[_Candidate]] = {}
+    recipe_outputs: Dict[str, Tuple[str, ...]] = {}
+    for cls, data in recipes.items():
+        if "Desc_Converter_C" in data.get("producedIn", []):
+            continue
+        outputs = tuple(prod["item"] for prod in data.get("products", []))
+        recipe_outputs[cls] = outputs
+        cand = _candidate(cls, data)
+        for item in outputs:
+            by_item.setdefault(item, []).append(cand)
+
+    by_output = _map_recipes(by_item, items, DISABLED_RECIPES)
+    resolved = _resolve_recipes(by_output, buildings, item_names)
+
+    ITEMS, RECIPES, BUILDINGS = items, recipes, buildings
+    ITEMS_BY_NAME, ITEM_NAMES = items_by_name, item_names
+    ITEM_NAMES_SORTED, RECIPES_BY_NAME = names_sorted, recipes_by_name
+    ALT_RECIPES = alt_recipes
+    _ITEM_BITS = item_bits
+    _BY_ITEM_CANDIDATES, _RECIPE_OUTPUTS = by_item, recipe_outputs
+    RECIPES_BY_OUTPUT, RESOLVED = by_output, resolved
+    _DATA_LOADED = True
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_TABLES:
+        _load_data()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def set_disabled_recipes(disabled: Set[str]) -> None:
+    """Update globally disabled recipes and refresh the recipe mapping.
+
+    Only items produced by recipes whose disabled state changed are picked
+    again. If the data files have not been loaded yet the new set is only
+    stored and applied when the tables are first built.
+    """
+    global DISABLED_RECIPES
+    with _LOCK:
+        new = set(disabled)
+        changed = DISABLED_RECIPES ^ new
+        DISABLED_RECIPES = new
+        if not changed:
+            return
+        if not _DATA_LOADED:
+            return
+        items = {item for cls in changed for item in _RECIPE_OUTPUTS.get(cls, ())}
+        for item in items:
+            recs = [c for c in _BY_ITEM_CANDIDATES[item] if c.recipe_class not in new]
+            best = _best_recipe(item, recs, ITEMS)
+            entry = (
+                _resolve_recipe(item, best, BUILDINGS, ITEM_NAMES)
+                if best is not None else None
+            )
+            if best is None:
+                RECIPES_BY_OUTPUT.pop(item, None)
+            else:
+                RECIPES_BY_OUTPUT[item] = best
+            if entry is None:
+                RESOLVED.pop(item, None)
+            else:
+                RESOLVED[item] = entry
+        if items:
+            _SUBTREE_CACHE.clear()
+            _REACH_CACHE.clear()
+
+
+class _NodeSpec(NamedTuple):
+    """Immutable description of one node of a production tree.
+
+    Rates and ``count`` are for 1 unit/min of the node's own primary output.
+    ``count`` is None for source and loop nodes, which are always a single
+    node.
+    """
+
+    name: str
+    base_power: float
+    inputs: Tuple[Tuple[str, float], ...]
+    outputs: Tuple[Tuple[str, float], ...]
+    primary_output: str
+    per_machine_output: float
+    count: float | None
+
+
+SubtreeKey = Tuple[str, int, int]
+# ``(spec, factor)`` pairs: the node's rates are ``spec`` rates times ``factor``
+Subtree = Tuple[Tuple[_NodeSpec, float], ...]
+# Unit-rate subtrees keyed by (item_id, ancestor bits, source bits), where
+# only the ancestors reachable from the item are kept (see _reach_bits).
+# Cleared by set_disabled_recipes since the chosen recipes decide the tree
+# shape, and once it grows past SUBTREE_CACHE_SIZE entries.
+SUBTREE_CACHE_SIZE = 4096
+_SUBTREE_CACHE: Dict[SubtreeKey, Subtree] = {}
+# Bits of the items reachable from an item, keyed by (item_id, source bits)
+_REACH_CACHE: Dict[Tuple[str, int], int] = {}
+
+
+def _leaf_spec(kind: str, item_id: str) -> _NodeSpec:
+    item_name = ITEM_NAMES.get(item_id, item_id)
+    return _NodeSpec(
+        name=f"{kind} {item_name}",
+        base_power=0.0,
+        inputs=(),
+        outputs=((item_name, 1.0),),
         primary_output=item_name,
+        per_machine_output=0.0,
+        count=None,
     )
-    nodes.append(node)
 
-    for ing in recipe.get('ingredients', []):
-        ing_id = ing['item']
-        ing_rate = machines * ing['amount'] * 60.0 / recipe['duration']
-        ing_name = ITEMS.get(ing_id, {}).get('name', ing_id)
-        node.inputs[ing_name] = ing_rate
-        _gen_nodes(ing_id, ing_rate, nodes, seen.copy(), sources)
+
+def _reach_bits(item_id: str, source_bits: int) -> int:
+    """Return the bits of ``item_id`` and every item its tree can expand.
+
+    Sources and raw resources are left out, as they always end the tree
+    whatever the ancestors are.
+    """
+    key = (item_id, source_bits)
+    bits = _REACH_CACHE.get(key)
+    if bits is None:
+        bits = 0
+        todo = [item_id]
+        while todo:
+            item = todo.pop()
+            bit = _ITEM_BITS.get(item, 0)
+            resolved = RESOLVED.get(item)
+            if bits & bit or source_bits & bit or not resolved:
+                continue
+            bits |= bit
+            todo.extend(ing_id for ing_id, _name, _amount in resolved.ingredients)
+        _REACH_CACHE[key] = bits
+    return bits
+
+
+def _unit_subtree(item_id: str, ancestors: int, source_bits: int) -> Subtree:
+    """Return the production tree for 1 unit/min of ``item_id``.
+
+    ``ancestors`` and ``source_bits`` are bitsets of ``_ITEM_BITS``: items on
+    the path above this one, where loops are cut, and items treated as raw
+    sources. The tree is listed in pre-order. Subtrees are built bottom-up
+    with an explicit stack, so long ingredient chains do not recurse.
+
+    Finished subtrees are kept in ``_SUBTREE_CACHE``. A subtree only depends
+    on the ancestors it can reach, so those are the only ones in its key: an
+    intermediate whose tree cannot loop back to its parents is expanded once
+    and then shared by all of them, while one that can is kept per distinct
+    set of reachable ancestors.
+    """
+    if len(_SUBTREE_CACHE) > SUBTREE_CACHE_SIZE:
+        _SUBTREE_CACHE.clear()
+    root = (item_id, ancestors & _reach_bits(item_id, source_bits), source_bits)
+    stack: List[SubtreeKey] = [root]
+    while stack:
+        key = stack[-1]
+        if key in _SUBTREE_CACHE:
+            stack.pop()
+            continue
+        item, anc, _src = key
+        bit = _ITEM_BITS.get(item, 0)
+        resolved = RESOLVED.get(item)
+        if source_bits & bit or not resolved:
+            _SUBTREE_CACHE[key] = ((_leaf_spec("Source", item), 1.0),)
+            stack.pop()
+            continue
+        if anc & bit:
+            _SUBTREE_CACHE[key] = ((_leaf_spec("Loop", item), 1.0),)
+            stack.pop()
+            continue
+
+        (item_name, building_name, base_power, per_machine,
+         recipe_name, duration, ingredients, products) = resolved
+        child_anc = anc | bit
+        child_keys = [
+            (ing_id, child_anc & _reach_bits(ing_id, source_bits), source_bits)
+            for ing_id, _name, _amount in ingredients
+        ]
+        missing = [k for k in child_keys if k not in _SUBTREE_CACHE]
+        if missing:
+            stack.extend(missing)
+            continue
+
+        # All ingredient subtrees are ready: assemble this one
+        machines = 1.0 / per_machine
+        m_inv_dur = machines * 60.0 / duration
+        inputs = tuple(
+            (ing_name, ing_amount * m_inv_dur)
+            for _id, ing_name, ing_amount in ingredients
+        )
+        spec = _NodeSpec(
+            name=f"{building_name} ({recipe_name})",
+            base_power=base_power,
+            inputs=inputs,
+            outputs=tuple(
+                (prod_name, prod_amount * m_inv_dur)
+                for prod_name, prod_amount in products
+            ),
+            primary_output=item_name,
+            per_machine_output=per_machine,
+            count=machines,
+        )
+        subtree = [(spec, 1.0)]
+        for child_key, (_ing_name, ing_rate) in zip(child_keys, inputs):
+            child = _SUBTREE_CACHE[child_key]
+            subtree.extend((sp, factor * ing_rate) for sp, factor in child)
+        _SUBTREE_CACHE[key] = tuple(subtree)
+        stack.pop()
+    return _SUBTREE_CACHE[root]
+
+
+def _gen_nodes(
+    item_id: str,
+    rate: float,
+    nodes: List[Node],
+    sources: Set[str] | None = None,
+) -> None:
+    """Append the production tree for ``item_id`` at ``rate`` to ``nodes``."""
+    _load_data()
+    source_bits = 0
+    for src in sources or ():
+        source_bits |= _ITEM_BITS.get(src, 0)
+    for spec, factor in _unit_subtree(item_id, 0, source_bits):
+        scale = factor * rate
+        nodes.append(Node(
+            name=spec.name,
+            base_power=spec.base_power,
+            inputs={k: v * scale for k, v in spec.inputs},
+            outputs={k: v * scale for k, v in spec.outputs},
+            primary_output=spec.primary_output,
+            count=1.0 if spec.count is None else spec.count * scale,
+            per_machine_output=spec.per_machine_output,
+        ))
 
 
 def generate_workspace(
     item_id: str, rate: float, sources: Set[str] | None = None
 ) -> List[Node]:
+    """Return merged production nodes for ``rate`` units/min of ``item_id``.
+
+    The unit-rate trees behind the result are cached (see ``_unit_subtree``),
+    but the returned nodes are always new, so callers may modify them.
+    """
+    _load_data()
     nodes: List[Node] = []
-    _gen_nodes(item_id, rate, nodes, set(), sources)
-    nodes = _merge_nodes(nodes)
-    return nodes
+    with _LOCK:
+        _gen_nodes(item_id, rate, nodes, sources)
+    return _merge_nodes(nodes)
+
+
+# Machine counts closer than this to a whole number are treated as exact
+_INTEGRAL_TOL = 1e-9
 
 
 def _merge_nodes(nodes: List[Node]) -> List[Node]:
@@ -187,21 +530,6 @@ def _merge_nodes(nodes: List[Node]) -> List[Node]:
     per_machine: Dict[str, float] = {}
     loops: Dict[str, float] = {}
 
-    def recipe_rate(name: str, out_name: str) -> float:
-        recipe_key = name.split("(")[-1].rstrip(")") if "(" in name else ""
-        recipe = RECIPES_BY_NAME.get(recipe_key)
-        if not recipe:
-            return 0.0
-        out_id = ITEMS_BY_NAME.get(out_name)
-        amount = 0.0
-        for p in recipe.get("products", []):
-            if p["item"] == out_id:
-                amount = p["amount"]
-                break
-        if amount <= 0:
-            amount = recipe.get("products", [{}])[0].get("amount", 0)
-        return amount * 60.0 / recipe.get("duration", 1)
-
     for node in nodes:
         key = node.name
         out_rate = node.outputs.get(node.primary_output, 0.0)
@@ -209,22 +537,18 @@ def _merge_nodes(nodes: List[Node]) -> List[Node]:
             loops[node.primary_output] = loops.get(node.primary_output, 0.0) + out_rate
             continue
         if key not in merged:
-            merged[key] = Node(
-                name=node.name,
-                base_power=node.base_power,
-                inputs=node.inputs.copy(),
-                outputs=node.outputs.copy(),
-                primary_output=node.primary_output,
-                clock=100.0,
-                shards=node.shards,
-                filled_slots=node.filled_slots,
-                total_slots=node.total_slots,
-                count=0.0,
-            )
+            # The nodes come straight from _gen_nodes and are not shared, so
+            # the first one of each key is reused and accumulates the rest.
             if key.startswith("Source"):
                 per_machine[key] = out_rate / node.count if node.count else out_rate
             else:
-                per_machine[key] = recipe_rate(node.name, node.primary_output)
+                per_machine[key] = node.per_machine_output
+            node.clock = 100.0
+            node.count = 0.0
+            # Its rates and clock are rewritten below, so nothing it may have
+            # cached so far stays valid
+            node.invalidate()
+            merged[key] = node
         else:
             m = merged[key]
             for k, v in node.inputs.items():
@@ -232,13 +556,16 @@ def _merge_nodes(nodes: List[Node]) -> List[Node]:
             for k, v in node.outputs.items():
                 m.outputs[k] = m.outputs.get(k, 0.0) + v
 
-    # Merge loop outputs into corresponding nodes
+    # Merge loop outputs into corresponding nodes, i.e. the first non-source
+    # node producing the item
+    producers: Dict[str, Node] = {}
+    for node in merged.values():
+        if node.name.startswith("Source"):
+            continue
+        for item in node.outputs:
+            producers.setdefault(item, node)
     for item, rate in loops.items():
-        target = None
-        for node in merged.values():
-            if item in node.outputs and not node.name.startswith("Source"):
-                target = node
-                break
+        target = producers.get(item)
         if target:
             target.outputs[item] = target.outputs.get(item, 0.0) + rate
         else:
@@ -267,16 +594,24 @@ def _merge_nodes(nodes: List[Node]) -> List[Node]:
             machines_needed = 1.0
         else:
             machines_needed = out_rate / pm
-        int_count = max(1, ceil(machines_needed))
-        clock = out_rate / (int_count * pm) * 100.0 if pm > 0 else 100.0
-        if out_rate > 0 and pm > 0:
+        nearest = round(machines_needed)
+        if nearest >= 1 and abs(nearest - machines_needed) < _INTEGRAL_TOL:
+            # Already a whole number of buildings (up to float noise): every
+            # building runs at 100% and no rescaling is needed.
+            int_count = nearest
+            clock = 100.0
+            scale = 1.0
+        else:
+            int_count = max(1, ceil(machines_needed))
+            clock = round(out_rate / (int_count * pm) * 100.0, 4) if pm > 0 else 100.0
             scale = int_count / machines_needed if machines_needed > 0 else 1.0
+        if out_rate > 0 and pm > 0 and scale != 1.0:
             for k in node.inputs:
                 node.inputs[k] *= scale
             for k in node.outputs:
                 node.outputs[k] *= scale
         node.count = float(int_count)
-        node.clock = round(clock, 4)
+        node.clock = clock
         result.append(node)
 
     return result
@@ -1,104 +1,106 @@
-import json
-import os
+import re
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Dict, List
 
+from . import auto
 from .models import Node
-from .auto import set_disabled_recipes
+from ._json import dump_workspace, load_file
+from .auto import generate_workspace, set_disabled_recipes
 from .summary import compute_summary
 
 WORKSPACE_FILE = "workspace.json"
 
 
+# One ``item: qty`` pair per comma separated part of a line. Parts without a
+# colon or with a non-numeric quantity do not match and are skipped.
+_PAIR_RE = re.compile(
+    r"(?:^|,)[^\S\n]*([^,:\n]*?)[^\S\n]*:[^\S\n]*"
+    r"([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)[^\S\n]*(?=,|$)",
+    re.MULTILINE,
+)
+
+
 def parse_lines(text: str) -> Dict[str, float]:
-    result: Dict[str, float] = {}
-    for line in text.strip().splitlines():
-        if not line.strip():
-            continue
-        for part in line.split(','):
-            if ':' in part:
-                item, qty = part.split(':', 1)
-                try:
-                    result[item.strip()] = float(qty)
-                except ValueError:
-                    pass
-    return result
+    return {m.group(1): float(m.group(2)) for m in _PAIR_RE.finditer(text)}
+
+
+def _read_block() -> str:
+    """Read lines from stdin up to an empty line (or end of input)."""
+    lines = []
+    for ln in iter(sys.stdin.readline, ""):
+        ln = ln.rstrip("\n")
+        if not ln.strip():
+            break
+        lines.append(ln)
+    return "\n".join(lines)
 
 
 class ConsoleApp:
     def __init__(self) -> None:
         self.nodes: List[Node] = []
         self.disabled_recipes: set[str] = set()
+        # True when the workspace differs from what was last loaded or saved
+        self._dirty = False
+        # max_workers=1 is what makes the background expansion safe: it keeps
+        # generate_workspace calls serialised, since they fill the module
+        # level caches in ``auto`` as they go.  edit_recipes only runs
+        # between commands, after auto_build has waited for its futures.
+        self._pool = ThreadPoolExecutor(max_workers=1)
         self.load_workspace()
 
     def load_workspace(self) -> None:
-        if os.path.exists(WORKSPACE_FILE):
-            with open(WORKSPACE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                self.nodes = [Node.from_dict(d) for d in data]
-                self.disabled_recipes = set()
-            else:
-                self.nodes = [Node.from_dict(d) for d in data.get("nodes", [])]
-                self.disabled_recipes = set(data.get("disabled_recipes", []))
-            set_disabled_recipes(self.disabled_recipes)
+        try:
+            data = load_file(WORKSPACE_FILE)
+        except FileNotFoundError:
+            return
+        if isinstance(data, list):
+            self.nodes = [Node.from_dict(d) for d in data]
+            self.disabled_recipes = set()
+        else:
+            self.nodes = [Node.from_dict(d) for d in data.get("nodes", [])]
+            self.disabled_recipes = set(data.get("disabled_recipes", []))
+        set_disabled_recipes(self.disabled_recipes)
+        self._dirty = False
 
     def save_workspace(self) -> None:
-        data = {
-            "nodes": [n.to_dict() for n in self.nodes],
-            "disabled_recipes": list(self.disabled_recipes),
-        }
-        with open(WORKSPACE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        dump_workspace(
+            (n.to_dict() for n in self.nodes), self.disabled_recipes, WORKSPACE_FILE
+        )
+        self._dirty = False
         print("Workspace saved")
 
     def list_nodes(self) -> None:
         if not self.nodes:
             print("No nodes defined")
             return
-        for idx, node in enumerate(self.nodes):
-            outs = ", ".join(
-                f"{item} {amt:.1f}/\uBD84" for item, amt in node.scaled_outputs().items()
-            )
-            print(
-                f"{idx}: {node.name} | {outs} | Power {node.power_usage():.2f} MW"
-            )
+        rate = "{0} {1:.1f}/\uBD84".format
+        lines = [
+            f"{idx}: {node.name} | "
+            f"{', '.join(rate(k, v) for k, v in node.scaled_outputs().items())} | "
+            f"Power {node.power_usage():.2f} MW"
+            for idx, node in enumerate(self.nodes)
+        ]
         summary = compute_summary(self.nodes)
-        if summary["sources"]:
-            src = ", ".join(
-                f"{k} {v:.1f}/\uBD84" for k, v in summary["sources"].items()
-            )
-            print(f"Sources: {src}")
-        if summary["byproducts"]:
-            bp = ", ".join(
-                f"{k} {v:.1f}/\uBD84" for k, v in summary["byproducts"].items()
-            )
-            print(f"Byproducts: {bp}")
-        if summary["products"]:
-            prod = ", ".join(
-                f"{k} {v:.1f}/\uBD84" for k, v in summary["products"].items()
-            )
-            print(f"Products: {prod}")
-        print(f"Power: {summary['power']:.2f} MW")
+        for key, title in (
+            ("sources", "Sources"),
+            ("byproducts", "Byproducts"),
+            ("products", "Products"),
+        ):
+            if summary[key]:
+                lines.append(
+                    f"{title}: {', '.join(rate(k, v) for k, v in summary[key].items())}"
+                )
+        lines.append(f"Power: {summary['power']:.2f} MW")
+        print("\n".join(lines))
 
     def add_node(self) -> None:
         name = input("Name: ").strip()
         base_power = float(input("Base Power: ").strip() or 0)
         print("Enter inputs (item:qty, comma separated per line). End with empty line")
-        lines = []
-        while True:
-            ln = input()
-            if not ln:
-                break
-            lines.append(ln)
-        inputs = parse_lines("\n".join(lines))
+        inputs = parse_lines(_read_block())
         print("Enter outputs (item:qty, comma separated per line). End with empty line")
-        lines = []
-        while True:
-            ln = input()
-            if not ln:
-                break
-            lines.append(ln)
-        outputs = parse_lines("\n".join(lines))
+        outputs = parse_lines(_read_block())
         shards = int(input("Power Shards (default 0): ").strip() or 0)
         max_clock = min(250.0, 100.0 + shards * 50.0)
         clock = float(input(f"Clock Speed % (0-{max_clock}): ").strip() or 100)
@@ -111,21 +113,45 @@ class ConsoleApp:
         total = int(input("Total Slots (default 0): ").strip() or 0)
         node = Node(name, base_power, inputs, outputs, clock, shards, filled, total)
         self.nodes.append(node)
+        self._dirty = True
         print("Node added")
 
+    def add_auto_target(self, item_id: str, rate: float) -> "Future[List[Node]]":
+        return self._pool.submit(generate_workspace, item_id, rate)
+
+    def auto_build(self) -> None:
+        text = input("Targets (item:rate per minute, comma separated): ")
+        futures = []
+        for name, rate in parse_lines(text).items():
+            item_id = auto.ITEMS_BY_NAME.get(name)
+            if item_id is None or rate <= 0:
+                print(f"Skipping {name}")
+                continue
+            futures.append(self.add_auto_target(item_id, rate))
+        if not futures:
+            return
+        print("Expanding", end="", flush=True)
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=0.2)
+            print(".", end="", flush=True)
+        print()
+        for fut in futures:
+            self.nodes.extend(fut.result())
+        self._dirty = True
+        print("Nodes generated")
+
     def delete_node(self) -> None:
         idx = int(input("Index to delete: "))
         if 0 <= idx < len(self.nodes):
             del self.nodes[idx]
+            self._dirty = True
             print("Node deleted")
         else:
             print("Invalid index")
 
     def edit_recipes(self) -> None:
-        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'recipes.json'), 'r', encoding='utf-8') as f:
-            recs = json.load(f)
-        alt = {rid: r['name'] for rid, r in recs.items() if r.get('alternate')}
-        items = sorted(alt.items(), key=lambda x: x[1])
+        items = auto.ALT_RECIPES
         for idx, (rid, name) in enumerate(items):
             mark = '*' if rid in self.disabled_recipes else ' '
             print(f"{idx}: [{mark}] {name}")
@@ -140,6 +166,7 @@ class ConsoleApp:
                     self.disabled_recipes.remove(rid)
                 else:
                     self.disabled_recipes.add(rid)
+                self._dirty = True
             except (ValueError, IndexError):
                 pass
         set_disabled_recipes(self.disabled_recipes)
@@ -149,14 +176,18 @@ class ConsoleApp:
         while True:
             cmd = input("Command (help for list): ").strip().lower()
             if cmd in {"quit", "exit"}:
-                self.save_workspace()
+                if self._dirty:
+                    self.save_workspace()
+                self._pool.shutdown()
                 break
             elif cmd == "help":
-                print("Commands: list, add, delete, recipes, save, load, quit")
+                print("Commands: list, add, auto, delete, recipes, save, load, quit")
             elif cmd == "list":
                 self.list_nodes()
             elif cmd == "add":
                 self.add_node()
+            elif cmd == "auto":
+                self.auto_build()
             elif cmd == "delete":
                 self.delete_node()
             elif cmd == "recipes":
@@ -1,17 +1,16 @@
-import json
-import os
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Set
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import networkx as nx
-import matplotlib.pyplot as plt
-from networkx.drawing.nx_pydot import to_pydot
-from PIL import Image
 import io
 import math
 
 from .models import Node
-from .auto import generate_workspace, set_disabled_recipes, RECIPES_BY_OUTPUT
+from ._json import dump_workspace, load_file
+from . import auto
+from .auto import generate_workspace, set_disabled_recipes
 from .summary import compute_summary
 
 WORKSPACE_FILE = "workspace.json"
@@ -30,12 +29,77 @@ def format_close_number(x: float, ndigits: int = 3, tol: float = 1e-4) -> str:
         return f"{rounded:g}"
     return f"{x:.{ndigits}g}"
 
+def _render_png(
+    node_list: List[tuple[str, str]], edge_list: List[tuple[str, str, str]]
+) -> bytes:
+    """Lay out the graph left to right with Graphviz ``dot`` and return a PNG.
+
+    PyGraphviz is used when it is installed since it renders in process;
+    otherwise pydot runs the ``dot`` executable.
+    """
+    style = {"shape": "rectangle", "style": "filled", "fillcolor": "#A7D3F3"}
+    try:
+        import pygraphviz
+    except ImportError:
+        pygraphviz = None
+
+    if pygraphviz is not None:
+        A = pygraphviz.AGraph(directed=True, strict=True, rankdir="LR")
+        A.node_attr.update(style)
+        for node_id, label in node_list:
+            A.add_node(node_id, label=label)
+        for src, dst, label in edge_list:
+            A.add_edge(src, dst, label=label)
+        A.layout(prog="dot")
+        return A.draw(format="png")
+
+    import pydot
+
+    # Build the pydot graph directly; going through networkx and to_pydot
+    # would only copy every node and edge once more.
+    P = pydot.Dot(graph_type="digraph", strict=True, rankdir="LR")
+    P.set_node_defaults(**style)
+    for node_id, label in node_list:
+        P.add_node(pydot.Node(node_id, label=label))
+    for src, dst, label in edge_list:
+        P.add_edge(pydot.Edge(src, dst, label=label))
+    return P.create_png(prog="dot")
+
+
+def _build_workspace(
+    item_id: str, rate: float, sources: Set[str]
+) -> tuple[List[Node], Dict]:
+    """Generate the nodes for an Auto Build target and their summary.
+
+    Runs on the App worker. The summary is computed here while the new nodes
+    are still private to this thread, so the Tk thread only has to show it.
+    """
+    nodes = generate_workspace(item_id, rate, sources)
+    return nodes, compute_summary(nodes)
+
+
 class App(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title("Satisfactory Flow")
         self.nodes: List[Node] = []
         self.disabled_recipes: Set[str] = set()
+        # True when the workspace differs from what was last loaded or saved
+        self._dirty = False
+        # Graph elements and decoded image of the last rendered graph, and
+        # the window, figure and canvas showing it with the image size the
+        # figure was made for
+        self._graph_key: tuple | None = None
+        self._graph_img = None
+        self._graph_win: tk.Toplevel | None = None
+        self._graph_fig = None
+        self._graph_canvas = None
+        self._graph_size: tuple[int, int] | None = None
+        # Auto Build runs here so the window keeps handling events meanwhile.
+        # One worker keeps generate_workspace calls serialised, since it
+        # fills the module level caches in ``auto`` as it goes.
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._auto_future: Future[tuple[List[Node], Dict]] | None = None
         set_disabled_recipes(self.disabled_recipes)
         self._create_widgets()
         self.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -57,16 +121,27 @@ class App(tk.Tk):
 
         self.bind("<Control-s>", lambda _e: self.save_workspace())
 
-    def refresh_list(self) -> None:
-        self.node_list.delete(0, tk.END)
+    def refresh_list(self, summary: Dict | None = None) -> None:
+        """Redraw the node list and the summary below it.
+
+        ``summary`` is used as is when given, e.g. the one Auto Build worked
+        out on the worker, instead of computing it again here.
+        """
+        rows = []
         for node in self.nodes:
             outs = ", ".join(
                 f"{item} {format_close_number(amt)}/min" for item, amt in node.scaled_outputs().items()
             )
-            self.node_list.insert(
-                tk.END, f"{node.name} | {outs} | Power {format_close_number(node.power_usage())} MW"
-            )
-        summary = compute_summary(self.nodes)
+            rows.append(f"{node.name} | {outs} | Power {format_close_number(node.power_usage())} MW")
+        # One Tcl call for all rows instead of one per node
+        self.node_list.delete(0, tk.END)
+        if rows:
+            self.node_list.insert(tk.END, *rows)
+        if summary is None:
+            summary = compute_summary(self.nodes)
+        self._show_summary(summary)
+
+    def _show_summary(self, summary: Dict) -> None:
         parts: List[str] = []
         if summary["sources"]:
             src = ", ".join(
@@ -88,109 +163,206 @@ class App(tk.Tk):
 
 
     def auto_build(self) -> None:
+        if self._auto_future is not None:
+            return  # a build is still running
         dlg = AutoDialog(self)
         res = dlg.result
         if not res:
             return
         sources = set(res.get('sources', []))
-        self.nodes = generate_workspace(res['item_id'], res['rate'], sources)
-        self.refresh_list()
+        self._auto_future = self._pool.submit(
+            _build_workspace, res['item_id'], res['rate'], sources
+        )
+        self.config(cursor="watch")
+        self.after(50, self._poll_auto_build)
+
+    def _poll_auto_build(self) -> None:
+        fut = self._auto_future
+        if fut is None:
+            return
+        if not fut.done():
+            self.after(50, self._poll_auto_build)
+            return
+        self._auto_future = None
+        self.config(cursor="")
+        try:
+            nodes, summary = fut.result()
+        except Exception as exc:
+            messagebox.showerror("Error", f"Auto Build failed: {exc}")
+            return
+        self.nodes = nodes
+        self._dirty = True
+        self.refresh_list(summary)
 
     def manage_recipes(self) -> None:
         dlg = RecipeDialog(self, self.disabled_recipes)
         res = dlg.result
         if res is not None:
+            if res != self.disabled_recipes:
+                self._dirty = True
             self.disabled_recipes = res
+            # Applied here rather than on the worker so the dialogs, which
+            # read the recipe tables on this thread, never see them half
+            # updated. A running Auto Build holds the lock in ``auto`` and
+            # finishes first.
             set_disabled_recipes(self.disabled_recipes)
 
-    def build_graph(self) -> nx.DiGraph:
-        """Return a directed graph of all nodes with duplicates for ``count``."""
-        G = nx.DiGraph()
+    def _graph_elements(
+        self,
+    ) -> tuple[List[tuple[str, str]], List[tuple[str, str, str]]]:
+        """Return ``(node_id, label)`` and ``(src, dst, label)`` graph lists.
+
+        Every node is repeated once per machine, except sources.
+        """
         node_map: List[tuple[str, Node]] = []
+        labels: List[str] = []
+        scaled: List[tuple[Dict[str, float], Dict[str, float]]] = []
         for idx, node in enumerate(self.nodes):
             cnt = max(1, int(round(node.count)))
             if node.name.startswith("Source"):
                 cnt = 1
+            outs = node.scaled_outputs()
+            ins = node.scaled_inputs()
+            rate = outs.get(node.primary_output, next(iter(outs.values())))
+            if node.name.startswith("Source"):
+                label = f"{node.name}\n{format_close_number(rate)}/min"
+            else:
+                label = f"{node.name}\n{format_close_number(node.clock)}%\n{format_close_number(rate)}/min"
             for i in range(cnt):
-                node_id = f"{idx}_{i}"
-                outs = node.scaled_outputs()
-                rate = outs.get(node.primary_output, next(iter(outs.values())))
-                if node.name.startswith("Source"):
-                    label = f"{node.name}\n{format_close_number(rate)}/min"
-                else:
-                    label = f"{node.name}\n{format_close_number(node.clock)}%\n{format_close_number(rate)}/min"
-                G.add_node(node_id, label=label)
-                node_map.append((node_id, node))
-
-        for src_id, src_node in node_map:
-            src_outs = src_node.scaled_outputs()
-            for dst_id, dst_node in node_map:
-                if src_id == dst_id:
-                    continue
-                dst_ins = dst_node.scaled_inputs()
-                for item in src_node.outputs:
-                    if item in dst_node.inputs:
-                        rate = min(src_outs.get(item, 0.0), dst_ins.get(item, 0.0))
-                        label = f"{item} {format_close_number(rate)}/min"
-                        G.add_edge(src_id, dst_id, label=label)
-        return G
+                node_map.append((f"{idx}_{i}", node))
+                labels.append(label)
+                scaled.append((outs, ins))
+
+        # Index the consumers of every item so each producer only visits the
+        # nodes that actually take one of its outputs.
+        consumers: Dict[str, List[int]] = {}
+        for pos, (_id, node) in enumerate(node_map):
+            for item in node.inputs:
+                consumers.setdefault(item, []).append(pos)
+
+        edge_list: List[tuple[str, str, str]] = []
+        for src_pos, (src_id, src_node) in enumerate(node_map):
+            src_outs = scaled[src_pos][0]
+            # A later item overwrites the label of an earlier one for the
+            # same pair, and edges are added in destination order.
+            edges: Dict[int, str] = {}
+            for item in src_node.outputs:
+                for dst_pos in consumers.get(item, ()):
+                    if dst_pos == src_pos:
+                        continue
+                    rate = min(src_outs.get(item, 0.0), scaled[dst_pos][1].get(item, 0.0))
+                    edges[dst_pos] = f"{item} {format_close_number(rate)}/min"
+            edge_list.extend(
+                (src_id, node_map[dst_pos][0], edges[dst_pos])
+                for dst_pos in sorted(edges)
+            )
+
+        node_list = [(node_id, label) for (node_id, _node), label in zip(node_map, labels)]
+        return node_list, edge_list
 
     def show_graph(self) -> None:
         """Display the graph using Graphviz to avoid overlaps."""
-        # Save workspace before showing the graph
+        # matplotlib, PIL and (in _render_png) the Graphviz bindings are only
+        # needed here, so they are imported on first use; starting the app or
+        # the console fallback, which imports this module, does not pay for them
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from PIL import Image
+
+        # Save workspace before showing the graph, even without changes, as
+        # README and AGENT_TESTING.md promise
         self.save_workspace()
-        G = self.build_graph()
-
-        # Convert to pydot graph and configure appearance
-        P = to_pydot(G)
-        P.set_rankdir("LR")
-        for node in P.get_nodes():
-            node.set_shape("rectangle")
-            node.set_style("filled")
-            node.set_fillcolor("#A7D3F3")
-
-        # Render to PNG using Graphviz
-        png_bytes = P.create_png(prog="dot")
-        img = Image.open(io.BytesIO(png_bytes))
-
-        fig, ax = plt.subplots(figsize=(img.width / 80, img.height / 80))
+        node_list, edge_list = self._graph_elements()
+
+        # Labels carry the clock and rates, so equal elements mean the same
+        # picture and Graphviz does not need to run again.
+        key = (tuple(node_list), tuple(edge_list))
+        if key != self._graph_key:
+            png_bytes = _render_png(node_list, edge_list)
+            self._graph_img = Image.open(io.BytesIO(png_bytes))
+            self._graph_key = key
+        img = self._graph_img
+
+        if self._graph_win is not None and self._graph_win.winfo_exists():
+            win = self._graph_win
+            if img.size == self._graph_size:
+                # Window still open with a figure of the right size: redraw
+                # it in place
+                ax = self._graph_fig.axes[0]
+                ax.clear()
+                ax.imshow(img)
+                ax.axis("off")
+                self._graph_canvas.draw_idle()
+                win.lift()
+                return
+            # The figure keeps its size when redrawn, so a graph of another
+            # shape gets a new figure and canvas in the same window
+            self._graph_canvas.get_tk_widget().destroy()
+            win.lift()
+        else:
+            # Embed the figure in a Toplevel of this app rather than going
+            # through pyplot, which would run a Tk root and event loop of its
+            # own.
+            win = tk.Toplevel(self)
+            win.title("Graph")
+            win.protocol("WM_DELETE_WINDOW", self._close_graph)
+        fig = Figure(figsize=(img.width / 80, img.height / 80))
+        ax = fig.add_subplot(111)
         ax.imshow(img)
         ax.axis("off")
-        plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._graph_win, self._graph_fig, self._graph_canvas = win, fig, canvas
+        self._graph_size = img.size
+
+    def _close_graph(self) -> None:
+        if self._graph_win is not None:
+            self._graph_win.destroy()
+        self._graph_win = self._graph_fig = self._graph_canvas = None
+        self._graph_size = None
 
     def save_workspace(self) -> None:
-        data = {
-            "nodes": [n.to_dict() for n in self.nodes],
-            "disabled_recipes": list(self.disabled_recipes),
-        }
-        with open(WORKSPACE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        dump_workspace(
+            (n.to_dict() for n in self.nodes), self.disabled_recipes, WORKSPACE_FILE
+        )
+        self._dirty = False
         messagebox.showinfo("Saved", "Workspace saved")
 
     def load_workspace(self) -> None:
-        if os.path.exists(WORKSPACE_FILE):
-            with open(WORKSPACE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                self.nodes = [Node.from_dict(d) for d in data]
-                self.disabled_recipes = set()
-            else:
-                self.nodes = [Node.from_dict(d) for d in data.get("nodes", [])]
-                self.disabled_recipes = set(data.get("disabled_recipes", []))
-            set_disabled_recipes(self.disabled_recipes)
-            self.refresh_list()
+        try:
+            data = load_file(WORKSPACE_FILE)
+        except FileNotFoundError:
+            return
+        if isinstance(data, list):
+            self.nodes = [Node.from_dict(d) for d in data]
+            self.disabled_recipes = set()
+        else:
+            self.nodes = [Node.from_dict(d) for d in data.get("nodes", [])]
+            self.disabled_recipes = set(data.get("disabled_recipes", []))
+        set_disabled_recipes(self.disabled_recipes)
+        self._dirty = False
+        self.refresh_list()
 
     def on_close(self) -> None:
-        self.save_workspace()
+        if self._dirty:
+            self.save_workspace()
+        self._pool.shutdown(wait=False, cancel_futures=True)
         self.destroy()
 
 class AutoDialog(simpledialog.Dialog):
+    # (attribute, label, initial text) of the numeric entries below the target
+    ENTRY_FIELDS = (
+        ('rate', 'Rate per minute', ''),
+        ('somers', 'Max Somersloops', '0'),
+        ('shards', 'Max Power Shards', '0'),
+    )
+
     def body(self, frame: tk.Frame) -> tk.Entry:
-        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'items.json'), 'r', encoding='utf-8') as f:
-            self.items = json.load(f)
-        names = sorted(v['name'] for v in self.items.values())
-        self.name_map = {v['name']: k for k, v in self.items.items()}
+        self.items = auto.ITEMS
+        names = auto.ITEM_NAMES_SORTED
+        self.name_map = auto.ITEMS_BY_NAME
         self.user_edited = False
 
         ttk.Label(frame, text='Target Item').grid(row=0, column=0)
@@ -200,26 +372,22 @@ class AutoDialog(simpledialog.Dialog):
             self.cb.set(names[0])
         self.cb.bind('<<ComboboxSelected>>', lambda _e: self._on_target_change())
 
-        ttk.Label(frame, text='Rate per minute').grid(row=1, column=0)
-        self.rate = tk.Entry(frame)
-        self.rate.grid(row=1, column=1)
-
-        ttk.Label(frame, text='Max Somersloops').grid(row=2, column=0)
-        self.somers = tk.Entry(frame)
-        self.somers.grid(row=2, column=1)
-        self.somers.insert(0, '0')
-
-        ttk.Label(frame, text='Max Power Shards').grid(row=3, column=0)
-        self.shards = tk.Entry(frame)
-        self.shards.grid(row=3, column=1)
-        self.shards.insert(0, '0')
-
-        ttk.Label(frame, text='Source Items').grid(row=4, column=0, sticky='nw')
+        for row, (attr, label, default) in enumerate(self.ENTRY_FIELDS, start=1):
+            ttk.Label(frame, text=label).grid(row=row, column=0)
+            entry = tk.Entry(frame)
+            entry.grid(row=row, column=1)
+            if default:
+                entry.insert(0, default)
+            setattr(self, attr, entry)
+
+        # The sources go below the target row and the numeric entries
+        src_row = len(self.ENTRY_FIELDS) + 1
+        ttk.Label(frame, text='Source Items').grid(row=src_row, column=0, sticky='nw')
         self.source_frame = ttk.Frame(frame)
-        self.source_frame.grid(row=4, column=1, sticky='w')
+        self.source_frame.grid(row=src_row, column=1, sticky='w')
         self.source_boxes: List[ttk.Combobox] = []
         self._set_sources([])
-        ttk.Button(frame, text='+', command=lambda: self._add_source_row(user=True)).grid(row=5, column=1, sticky='w')
+        ttk.Button(frame, text='+', command=lambda: self._add_source_row(user=True)).grid(row=src_row + 1, column=1, sticky='w')
 
         self._on_target_change()
 
@@ -227,9 +395,9 @@ class AutoDialog(simpledialog.Dialog):
 
     def validate(self) -> bool:
         try:
-            float(self.rate.get())
-            int(self.somers.get())
-            int(self.shards.get())
+            self._rate = float(self.rate.get())
+            self._loops = int(self.somers.get())
+            self._shards = int(self.shards.get())
         except ValueError:
             messagebox.showerror('Error', 'Invalid numeric input')
             return False
@@ -240,13 +408,13 @@ class AutoDialog(simpledialog.Dialog):
             row.destroy()
         self.source_boxes.clear()
         if not names:
-            names = [sorted(self.name_map.keys())[0]] if self.name_map else []
+            names = auto.ITEM_NAMES_SORTED[:1]
         for n in names:
             self._add_source_row(value=n, user=False)
 
     def _add_source_row(self, value: str | None = None, user: bool = False) -> None:
         row = ttk.Frame(self.source_frame)
-        names = sorted(self.name_map.keys())
+        names = auto.ITEM_NAMES_SORTED
         cb = ttk.Combobox(row, values=names, state='readonly')
         if names:
             cb.set(value or names[0])
@@ -275,7 +443,7 @@ class AutoDialog(simpledialog.Dialog):
             return
         item_name = self.cb.get()
         item_id = self.name_map.get(item_name)
-        recipe = RECIPES_BY_OUTPUT.get(item_id)
+        recipe = auto.RECIPES_BY_OUTPUT.get(item_id)
         if not recipe:
             self._set_sources([])
             return
@@ -289,9 +457,6 @@ class AutoDialog(simpledialog.Dialog):
     def apply(self) -> None:
         item_name = self.cb.get()
         item_id = self.name_map[item_name]
-        rate = float(self.rate.get())
-        loops = int(self.somers.get())
-        shards = int(self.shards.get())
         source_ids = []
         for _row, cb in self.source_boxes:
             name = cb.get()
@@ -299,9 +464,9 @@ class AutoDialog(simpledialog.Dialog):
                 source_ids.append(self.name_map[name])
         self.result = {
             'item_id': item_id,
-            'rate': rate,
-            'max_loops': loops,
-            'max_shards': shards,
+            'rate': self._rate,
+            'max_loops': self._loops,
+            'max_shards': self._shards,
             'sources': source_ids,
         }
 
@@ -309,8 +474,7 @@ class AutoDialog(simpledialog.Dialog):
 class RecipeDialog(simpledialog.Dialog):
     def __init__(self, master: tk.Misc, disabled: Set[str]):
         self.disabled = set(disabled)
-        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'recipes.json'), 'r', encoding='utf-8') as f:
-            self.recipes = json.load(f)
+        self.recipes = auto.RECIPES
         super().__init__(master, title='Disabled Recipes')
 
     def body(self, frame: tk.Frame) -> tk.Entry:
@@ -333,6 +497,7 @@ class RecipeDialog(simpledialog.Dialog):
 
         self.vars: Dict[str, tk.BooleanVar] = {}
         self.checks: Dict[str, ttk.Checkbutton] = {}
+        self._names: Dict[str, str] = {}
         row = 0
         for r_id, rec in sorted(self.recipes.items(), key=lambda x: x[1]['name']):
             var = tk.BooleanVar(value=r_id in self.disabled)
@@ -340,21 +505,42 @@ class RecipeDialog(simpledialog.Dialog):
             chk.grid(row=row, column=0, sticky='w')
             self.vars[r_id] = var
             self.checks[r_id] = chk
+            self._names[r_id] = rec['name'].lower()
             row += 1
+        # Every check starts out shown, matching the empty search
+        self._visible: Set[str] = set(self.checks)
+        self._filter_job: str | None = None
 
-        self.search_var.trace_add('write', lambda *_: self._filter())
-        self._filter()
+        self.search_var.trace_add('write', lambda *_: self._schedule_filter())
 
         return entry
 
+    def _schedule_filter(self) -> None:
+        """Filter once typing pauses instead of on every keystroke."""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(150, self._filter)
+
     def _filter(self) -> None:
+        self._filter_job = None
         query = self.search_var.get().lower()
         for rid, chk in self.checks.items():
-            name = self.recipes.get(rid, {}).get('name', '').lower()
-            if query in name:
+            # Only touch the geometry manager for checks that change state
+            show = query in self._names[rid]
+            if show == (rid in self._visible):
+                continue
+            if show:
                 chk.grid()
+                self._visible.add(rid)
             else:
                 chk.grid_remove()
+                self._visible.discard(rid)
+
+    def destroy(self) -> None:
+        if getattr(self, '_filter_job', None) is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        super().destroy()
 
     def apply(self) -> None:
         self.result = {rid for rid, var in self.vars.items() if var.get()}
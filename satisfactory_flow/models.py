@@ -1,7 +1,11 @@
 from dataclasses import dataclass, field
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
-@dataclass
+# Power draw scales with (clock / 100) ** POWER_EXPONENT (log2(2.5)).
+POWER_EXPONENT = 1.321928
+
+@dataclass(slots=True)
 class Node:
     name: str
     base_power: float
@@ -13,12 +17,43 @@ class Node:
     total_slots: int = 0
     count: float = 1.0
     primary_output: str = ""
+    per_machine_output: float = 0.0
+    # Memoized results of the methods below, by name; None when empty
+    _cache: Dict[str, Any] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def invalidate(self) -> None:
+        """Drop the cached power, clock factor, input/output rates and role.
+
+        Call this after changing a node whose methods may already have been
+        used, as ``power_usage``, ``scaled_inputs``, ``scaled_outputs``,
+        ``is_target_node`` and the clock factor used by the other rate
+        methods remember their first result.
+        """
+        self._cache = None
 
     def __post_init__(self) -> None:
-        self.clock = round(max(0.0, min(self.clock, self.max_clock())), 4)
+        # Same as round(max(0.0, min(clock, max_clock())), 4), inlined since
+        # this runs for every node built or loaded
+        clock = self.clock
+        max_clock = 100.0 + self.shards * 50.0
+        if max_clock > 250.0:
+            max_clock = 250.0
+        if max_clock < clock:
+            clock = max_clock
+        if not clock > 0.0:
+            clock = 0.0
+        self.clock = round(clock, 4)
         if self.shards < 0:
             self.shards = 0
 
+    def _memo(self) -> Dict[str, Any]:
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        return cache
+
     def max_clock(self) -> float:
         return min(250.0, 100.0 + self.shards * 50.0)
 
@@ -28,21 +63,61 @@ class Node:
         return (1 + (self.filled_slots / self.total_slots)) ** 2
 
     def power_usage(self) -> float:
-        base = self.base_power * self.count
-        multiplier = self.power_multiplier()
-        usage = base * multiplier * ((self.clock / 100) ** 1.321928)
+        cache = self._memo()
+        usage = cache.get("power")
+        if usage is None:
+            base = self.base_power * self.count
+            multiplier = self.power_multiplier()
+            usage = base * multiplier * ((self.clock / 100) ** POWER_EXPONENT)
+            cache["power"] = usage
         return usage
 
+    def _clock_factor(self) -> float:
+        """Rate multiplier of one machine from its clock and somersloops."""
+        cache = self._memo()
+        factor = cache.get("factor")
+        if factor is None:
+            factor = cache["factor"] = (self.clock / 100.0) * self.power_multiplier()
+        return factor
+
     def production_factor(self) -> float:
-        return (self.clock / 100.0) * self.power_multiplier() * self.count
+        return self._clock_factor() * self.count
+
+    def scaled_inputs(self) -> Mapping[str, float]:
+        """Return a read-only view of the input rates at the current clock."""
+        cache = self._memo()
+        scaled = cache.get("inputs")
+        if scaled is None:
+            factor = self._clock_factor()
+            scaled = cache["inputs"] = MappingProxyType(
+                {k: v * factor for k, v in self.inputs.items()}
+            )
+        return scaled
+
+    def scaled_outputs(self) -> Mapping[str, float]:
+        """Return a read-only view of the output rates at the current clock."""
+        cache = self._memo()
+        scaled = cache.get("outputs")
+        if scaled is None:
+            factor = self._clock_factor()
+            scaled = cache["outputs"] = MappingProxyType(
+                {k: v * factor for k, v in self.outputs.items()}
+            )
+        return scaled
 
-    def scaled_inputs(self) -> Dict[str, float]:
-        factor = (self.clock / 100.0) * self.power_multiplier()
-        return {k: v * factor for k, v in self.inputs.items()}
+    def is_target_node(self) -> bool:
+        """Whether ``primary_output`` counts as a product of the plan.
 
-    def scaled_outputs(self) -> Dict[str, float]:
-        factor = (self.clock / 100.0) * self.power_multiplier()
-        return {k: v * factor for k, v in self.outputs.items()}
+        Source and loop nodes only supply items, so their outputs are never
+        treated as targets.
+        """
+        cache = self._memo()
+        target = cache.get("target")
+        if target is None:
+            target = cache["target"] = bool(self.primary_output) and not (
+                self.name.startswith(("Source", "Loop"))
+            )
+        return target
 
     def to_dict(self) -> Dict:
         return {
@@ -56,6 +131,8 @@ class Node:
             "filled_slots": self.filled_slots,
             "total_slots": self.total_slots,
             "count": self.count,
+            # per_machine_output is left out: it only matters while auto.py
+            # merges freshly generated nodes
         }
 
     @staticmethod
@@ -71,5 +148,6 @@ class Node:
             filled_slots=d.get("filled_slots", 0),
             total_slots=d.get("total_slots", 0),
             count=d.get("count", 1.0),
+            per_machine_output=d.get("per_machine_output", 0.0),
         )
 
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass
-from typing import List
+from functools import lru_cache
+import math
+from typing import List, Tuple
 import networkx as nx
 import matplotlib.pyplot as plt
 
+from .models import POWER_EXPONENT
+
 
 @dataclass
 class BuildingPlan:
@@ -16,12 +21,20 @@ class BuildingPlan:
 
 def building_power(clock: float, base_power: float, loops: int, slots: int = 4) -> float:
     """Return power usage for a single building with given settings."""
-    return base_power * loops_multiplier(loops, slots) * ((clock / 100.0) ** 1.321928)
+    return base_power * loops_multiplier(loops, slots) * ((clock / 100.0) ** POWER_EXPONENT)
 
 
 def plan_power(plan: List[BuildingPlan], base_power: float, slots: int = 4) -> float:
-    """Total power usage of an entire building plan."""
-    return sum(building_power(p.clock, base_power, p.loops, slots) for p in plan)
+    """Total power usage of an entire building plan.
+
+    Plans from :func:`search_plan` repeat a few configurations many times, so
+    the power of each distinct ``(clock, loops)`` pair is computed only once.
+    """
+    counts = Counter((p.clock, p.loops) for p in plan)
+    return sum(
+        n * building_power(clock, base_power, loops, slots)
+        for (clock, loops), n in counts.items()
+    )
 
 
 def loops_multiplier(loops: int, slots: int = 4) -> float:
@@ -36,6 +49,22 @@ def max_clock_for_shards(shards: int) -> float:
     return min(250.0, 100.0 + shards * 50.0)
 
 
+@lru_cache(maxsize=16)
+def _combos(slots: int, max_shards_per_building: int) -> Tuple[Tuple[float, int, int], ...]:
+    """Return ``(capacity, shards, loops)`` per building setup, largest first."""
+    combos = []
+    for s in range(0, max_shards_per_building + 1):
+        for l in range(0, slots + 1):
+            cap = max_clock_for_shards(s) / 100.0 * loops_multiplier(l, slots)
+            combos.append((cap, s, l))
+    combos.sort(reverse=True)
+    return tuple(combos)
+
+
+# ``((buildings, shards, loops), ((cap, shards, loops), ...))`` for a sub plan
+_Solution = Tuple[Tuple[int, int, int], Tuple[Tuple[float, int, int], ...]]
+
+
 def search_plan(target: float, max_shards: int, max_loops: int,
                 slots: int = 4, max_shards_per_building: int = 3) -> List[BuildingPlan]:
     """Find a combination of buildings meeting the target production.
@@ -44,38 +73,52 @@ def search_plan(target: float, max_shards: int, max_loops: int,
     430%). Shards and loops are integers. Buildings may be partially
     underclocked to exactly hit the target.
     """
-    best: tuple[int, int, int, List[BuildingPlan]] | None = None
+    combos = _combos(slots, max_shards_per_building)
 
-    combos = []
-    for s in range(0, max_shards_per_building + 1):
-        for l in range(0, slots + 1):
-            cap = max_clock_for_shards(s) / 100.0 * loops_multiplier(l, slots)
-            combos.append((cap, s, l))
-    combos.sort(reverse=True)
-
-    def plan_key(p: List[BuildingPlan]) -> tuple[int, int, int]:
-        return (len(p), sum(b.shards for b in p), sum(b.loops for b in p))
+    # Best (buildings, shards, loops) key and combo sequence that covers the
+    # remaining target from a given budget. The suffix choice does not depend
+    # on how the state was reached, so every state is solved once.
+    memo: dict[tuple[int, int, int], _Solution | None] = {}
 
-    def backtrack(remaining: float, shards_left: int, loops_left: int, plan: List[BuildingPlan]):
-        nonlocal best
+    def solve(remaining: float, shards_left: int, loops_left: int) -> _Solution | None:
         if remaining <= 0:
-            key = plan_key(plan)
-            if best is None or key < best[:3]:
-                best = (*key, list(plan))
-            return
-        if best is not None and len(plan) >= best[0]:
-            return
-        for cap, s, l in combos:
+            return (0, 0, 0), ()
+        state = (round(remaining * 1e9), shards_left, loops_left)
+        if state in memo:
+            return memo[state]
+        best_sol: _Solution | None = None
+        for combo in combos:
+            cap, s, l = combo
             if s <= shards_left and l <= loops_left:
-                plan.append(BuildingPlan(shards=s, loops=l, clock=max_clock_for_shards(s), production=cap))
-                backtrack(remaining - cap, shards_left - s, loops_left - l, plan)
-                plan.pop()
-
-    backtrack(target, max_shards, max_loops, [])
-    if best is None:
-        raise ValueError("Target cannot be met with given shards and loops")
-
-    plan = best[3]
+                sub = solve(remaining - cap, shards_left - s, loops_left - l)
+                if sub is None:
+                    continue
+                (n, ss, ll), seq = sub
+                key = (n + 1, ss + s, ll + l)
+                if best_sol is None or key < best_sol[0]:
+                    best_sol = (key, (combo,) + seq)
+        memo[state] = best_sol
+        return best_sol
+
+    # One building is enough when an affordable combo covers the target; the
+    # best plan is then the one using the fewest shards, then loops.
+    single = [
+        (s, l, cap) for cap, s, l in combos
+        if cap >= target and s <= max_shards and l <= max_loops
+    ]
+    if target > 0 and single:
+        s, l, cap = min(single)
+        chosen: Tuple[Tuple[float, int, int], ...] = ((cap, s, l),)
+    else:
+        best = solve(target, max_shards, max_loops)
+        if best is None:
+            raise ValueError("Target cannot be met with given shards and loops")
+        chosen = best[1]
+
+    plan = [
+        BuildingPlan(shards=s, loops=l, clock=max_clock_for_shards(s), production=cap)
+        for cap, s, l in chosen
+    ]
     # Adjust final building to hit the target exactly
     total = sum(p.production for p in plan)
     if total > target:
@@ -96,7 +139,14 @@ def visualize_plan(plan: List[BuildingPlan]) -> None:
         G.add_node(f"B{i}", label=label)
         G.add_edge(f"B{i}", "Output")
     G.add_node("Output", label="Total")
-    pos = nx.spring_layout(G)
+    # The graph is a star around the output, so place the buildings evenly on
+    # a circle instead of running a force-directed layout.
+    step = 2 * math.pi / max(len(plan), 1)
+    pos = {
+        f"B{i}": (math.cos(i * step), math.sin(i * step))
+        for i in range(1, len(plan) + 1)
+    }
+    pos["Output"] = (0.0, 0.0)
     nx.draw(G, pos, with_labels=True, labels=nx.get_node_attributes(G, 'label'), node_color='lightblue')
     plt.show()
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Dict, List, Set
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Set
 
 from .models import Node
 
@@ -12,18 +13,18 @@ def compute_summary(nodes: List[Node]) -> Dict[str, Dict[str, float] | float]:
     ``byproducts`` for excess outputs not targeted, ``products`` for net
     production of targeted items and ``power`` for total power usage.
     """
-    totals: Dict[str, float] = {}
-    targets: Set[str] = {
-        n.primary_output
-        for n in nodes
-        if n.primary_output and not n.name.startswith(("Source", "Loop"))
-    }
+    totals: DefaultDict[str, float] = defaultdict(float)
+    targets: Set[str] = set()
+    power = 0.0
 
     for n in nodes:
+        power += n.power_usage()
+        if n.is_target_node():
+            targets.add(n.primary_output)
         for item, amt in n.scaled_outputs().items():
-            totals[item] = totals.get(item, 0.0) + amt
+            totals[item] += amt
         for item, amt in n.scaled_inputs().items():
-            totals[item] = totals.get(item, 0.0) - amt
+            totals[item] -= amt
 
     sources: Dict[str, float] = {}
     byproducts: Dict[str, float] = {}
@@ -37,7 +38,6 @@ def compute_summary(nodes: List[Node]) -> Dict[str, Dict[str, float] | float]:
             else:
                 byproducts[item] = val
 
-    power = sum(n.power_usage() for n in nodes)
     return {
         "sources": sources,
         "byproducts": byproducts,
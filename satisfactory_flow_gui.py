@@ -4,14 +4,18 @@ from satisfactory_flow.gui import App
 from satisfactory_flow.console import ConsoleApp
 
 
+# Checked once at import; the environment is not expected to change later.
+HAS_DISPLAY = os.name == "nt" or bool(
+    os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+)
+
+
 def has_display() -> bool:
-    if os.name == "nt":
-        return True
-    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return HAS_DISPLAY
 
 
 if __name__ == "__main__":
-    if has_display():
+    if HAS_DISPLAY:
         try:
             app = App()
             app.mainloop()
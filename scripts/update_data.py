@@ -1,7 +1,15 @@
 import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_URL = 'https://satisfactory.wiki.gg/api.php'
 
 TEMPLATES = {
@@ -10,6 +18,31 @@ TEMPLATES = {
     'recipes': 'Template:DocsRecipes.json',
 }
 
+# Raw template downloads and their ETags, see fetch_template
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Belt and pipe throughput as stated in the building description
+_THROUGHPUT_RE = re.compile(
+    r"(?:up to|Capacity:)\s*([0-9]+)[^0-9]*(?:resources|m\u00b3).*per minute"
+)
+
+# Logistics buildings are matched on their class name: belts and pipelines,
+# but not the lifts, pumps, supports and other attachments sharing the prefix
+_BELT_RE = re.compile("ConveyorBelt|Pipeline")
+_BELT_EXCLUDE_RE = re.compile(
+    "Lift|Pump|Junction|Valve|Support|Wall|Attachment|Crossing|Pole"
+    "|Stackable|NoIndicator"
+)
+
+
+def _write_bytes(data: bytes, path: str) -> None:
+    # Write next to the target and rename over it, so a failed run never
+    # leaves a truncated file behind
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
 
 def fetch_template(name: str) -> dict:
     params = {
@@ -18,40 +51,103 @@ def fetch_template(name: str) -> dict:
         'prop': 'wikitext',
         'format': 'json'
     }
-    r = requests.get(BASE_URL, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-    wikitext = data['parse']['wikitext']['*']
+    # The last download of each page is kept with its ETag, so an unchanged
+    # page is answered with 304 Not Modified and not transferred again
+    cached = os.path.join(CACHE_DIR, name + '.json')
+    etag_path = os.path.join(CACHE_DIR, name + '.etag')
+    headers = {}
+    try:
+        with open(etag_path, encoding='utf-8') as f:
+            etag = f.read().strip()
+        if etag and os.path.exists(cached):
+            headers['If-None-Match'] = etag
+    except FileNotFoundError:
+        pass
+    r = requests.get(BASE_URL, params=params, headers=headers, timeout=30)
+    wikitext = None
+    if r.status_code == 304:
+        try:
+            with open(cached, 'rb') as f:
+                wikitext = f.read()
+        except FileNotFoundError:
+            # The cached copy went away after the request was sent, so ask
+            # for the full page again
+            r = requests.get(BASE_URL, params=params, timeout=30)
+    if wikitext is None:
+        r.raise_for_status()
+        if orjson is not None:
+            data = orjson.loads(r.content)
+        else:
+            data = r.json()
+        wikitext = data['parse']['wikitext']['*'].encode('utf-8')
+        etag = r.headers.get('ETag')
+        if etag:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _write_bytes(wikitext, cached)
+            _write_bytes(etag.encode('utf-8'), etag_path)
+    if orjson is not None:
+        return orjson.loads(wikitext)
     return json.loads(wikitext)
 
 
-def save_json(data: dict, path: str) -> None:
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_json(data: dict, path: str, compact: bool = False) -> None:
+    if orjson is not None:
+        # orjson writes UTF-8 as is, matching ensure_ascii=False below
+        encoded = orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    elif compact:
+        encoded = json.dumps(
+            data, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+    else:
+        encoded = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    _write_bytes(encoded, path)
 
 
 def main() -> None:
-    items = fetch_template('items')
-    buildings = fetch_template('buildings')
-    recipes = fetch_template('recipes')
-
-    # gather building usage from recipes to filter only production buildings
+    # The three pages are independent, so fetch them in parallel instead of
+    # waiting on each request in turn. Each thread makes one request, so
+    # there is no connection to reuse and plain requests.get is enough.
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        items, buildings, recipes = ex.map(
+            fetch_template, ['items', 'buildings', 'recipes']
+        )
+
+    # gather building usage from recipes to filter only production buildings,
+    # and clean recipes in the same pass: keep only needed fields
     produced_in: set[str] = set()
     variable_power: dict[str, dict[str, float]] = {}
     port_counts: dict[str, dict[str, int]] = {}
-    for data in recipes.values():
+    clean_recipes = {}
+    for cls, data in recipes.items():
         info = data[0]
-        for b in info.get('producedIn', []):
+        buildings_used = info.get("producedIn", [])
+        if buildings_used:
+            clean_recipes[cls] = {
+                "name": info["name"],
+                "duration": info["duration"],
+                "ingredients": info.get("ingredients", []),
+                "products": info.get("products", []),
+                "producedIn": buildings_used,
+                "alternate": info.get("alternate", False),
+                "minPower": info.get("minPower"),
+                "maxPower": info.get("maxPower"),
+            }
+        for b in buildings_used:
             produced_in.add(b)
             min_p = info.get('minPower')
             max_p = info.get('maxPower')
             if min_p is not None or max_p is not None:
-                vp = variable_power.setdefault(b, {"minPower": float("inf"), "maxPower": 0})
+                # setdefault would build the default dict on every call
+                vp = variable_power.get(b)
+                if vp is None:
+                    vp = variable_power[b] = {"minPower": float("inf"), "maxPower": 0}
                 if min_p is not None and min_p < vp["minPower"]:
                     vp["minPower"] = min_p
                 if max_p is not None and max_p > vp["maxPower"]:
                     vp["maxPower"] = max_p
-            cnt = port_counts.setdefault(b, {"inputs": 0, "outputs": 0})
+            cnt = port_counts.get(b)
+            if cnt is None:
+                cnt = port_counts[b] = {"inputs": 0, "outputs": 0}
             cnt["inputs"] = max(cnt["inputs"], len(info.get("ingredients", [])))
             cnt["outputs"] = max(cnt["outputs"], len(info.get("products", [])))
 
@@ -66,10 +162,11 @@ def main() -> None:
             "form": info.get("form"),
         }
     save_json(clean_items, 'data/items.json')
+    save_json(clean_items, 'data/items.min.json', compact=True)
 
     # helper to parse throughput from description
     def parse_throughput(desc: str) -> int | None:
-        m = re.search(r"(?:up to|Capacity:)\s*([0-9]+)[^0-9]*(?:resources|m³).*per minute", desc)
+        m = _THROUGHPUT_RE.search(desc)
         if m:
             return int(m.group(1))
         return None
@@ -87,8 +184,8 @@ def main() -> None:
         name = info["name"]
 
         # logistics buildings (only belts and pipelines)
-        if any(key in cls for key in ["ConveyorBelt", "Pipeline"]):
-            if any(s in cls for s in ["Lift", "Pump", "Junction", "Valve", "Support", "Wall", "Attachment", "Crossing", "Pole", "Stackable", "NoIndicator"]):
+        if _BELT_RE.search(cls):
+            if _BELT_EXCLUDE_RE.search(cls):
                 continue
             entry = {"name": name}
             tp = parse_throughput(info.get("description", ""))
@@ -127,26 +224,12 @@ def main() -> None:
                 entry["maxPower"] = vp["maxPower"]
             prod_buildings[cls] = entry
 
-    # clean recipes: keep only needed fields
-    clean_recipes = {}
-    for cls, data in recipes.items():
-        info = data[0]
-        produced_in = info.get("producedIn", [])
-        if not produced_in:
-            continue
-        clean_recipes[cls] = {
-            "name": info["name"],
-            "duration": info["duration"],
-            "ingredients": info.get("ingredients", []),
-            "products": info.get("products", []),
-            "producedIn": produced_in,
-            "alternate": info.get("alternate", False),
-            "minPower": info.get("minPower"),
-            "maxPower": info.get("maxPower"),
-        }
-
     save_json(clean_recipes, 'data/recipes.json')
     save_json(prod_buildings, 'data/buildings.json')
+    # Compact copies of the tables the app loads at startup; the indented
+    # files above are kept for reading and diffing
+    save_json(clean_recipes, 'data/recipes.min.json', compact=True)
+    save_json(prod_buildings, 'data/buildings.min.json', compact=True)
     save_json(belts_pipes, 'data/belts_pipes.json')
     save_json(power_plants, 'data/power_plants.json')
 